@@ -115,21 +115,24 @@ Provide only the direct answer to what was asked.
         # Add AI's tool use response
         messages.append({"role": "assistant", "content": initial_response.content})
 
-        # Execute all tool calls and collect results
-        tool_results = []
-        for content_block in initial_response.content:
-            if content_block.type == "tool_use":
-                tool_result = tool_manager.execute_tool(
-                    content_block.name, **content_block.input
-                )
-
-                tool_results.append(
-                    {
-                        "type": "tool_result",
-                        "tool_use_id": content_block.id,
-                        "content": tool_result,
-                    }
-                )
+        # Execute all tool calls concurrently and collect results
+        tool_blocks = [
+            content_block
+            for content_block in initial_response.content
+            if content_block.type == "tool_use"
+        ]
+        tool_outputs = tool_manager.execute_tools(
+            [(content_block.name, content_block.input) for content_block in tool_blocks]
+        )
+
+        tool_results = [
+            {
+                "type": "tool_result",
+                "tool_use_id": content_block.id,
+                "content": tool_result,
+            }
+            for content_block, tool_result in zip(tool_blocks, tool_outputs)
+        ]
 
         # Add tool results as single message
         if tool_results:
@@ -6,7 +6,7 @@ import os
 from typing import List, Optional
 
 from config import config
-from fastapi import FastAPI, HTTPException
+from fastapi import Depends, FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
 from fastapi.staticfiles import StaticFiles
@@ -33,6 +33,12 @@ app.add_middleware(
 rag_system = RAGSystem(config)
 
 
+async def get_rag_system() -> RAGSystem:
+    """Dependency providing the RAG system; override it to inject another"""
+    # Async so FastAPI resolves it inline rather than in the threadpool
+    return rag_system
+
+
 # Pydantic models for request/response
 class QueryRequest(BaseModel):
     """Request model for course queries"""
@@ -67,7 +73,9 @@ class CourseStats(BaseModel):
 
 
 @app.post("/api/query", response_model=QueryResponse)
-async def query_documents(request: QueryRequest):
+async def query_documents(
+    request: QueryRequest, rag_system: RAGSystem = Depends(get_rag_system)
+):
     """Process a query and return response with sources"""
     try:
         # Create session if not provided
@@ -78,34 +86,37 @@ async def query_documents(request: QueryRequest):
         # Process query using RAG system
         answer, sources = rag_system.query(request.query, session_id)
 
-        # Convert sources to SourceCitation objects
+        # Convert sources to SourceCitation-shaped dicts; response_model
+        # validates the plain data once instead of rebuilding model objects
         formatted_sources = []
         for source in sources:
             if isinstance(source, dict):
                 # New format with text and link
                 formatted_sources.append(
-                    SourceCitation(text=source.get("text", ""), link=source.get("link"))
+                    {"text": source.get("text", ""), "link": source.get("link")}
                 )
             else:
                 # Fallback for old string format
-                formatted_sources.append(SourceCitation(text=str(source), link=None))
+                formatted_sources.append({"text": str(source), "link": None})
 
-        return QueryResponse(
-            answer=answer, sources=formatted_sources, session_id=session_id
-        )
+        return {
+            "answer": answer,
+            "sources": formatted_sources,
+            "session_id": session_id,
+        }
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @app.get("/api/courses", response_model=CourseStats)
-async def get_course_stats():
+async def get_course_stats(rag_system: RAGSystem = Depends(get_rag_system)):
     """Get course analytics and statistics"""
     try:
         analytics = rag_system.get_course_analytics()
-        return CourseStats(
-            total_courses=analytics["total_courses"],
-            course_titles=analytics["course_titles"],
-        )
+        return {
+            "total_courses": analytics["total_courses"],
+            "course_titles": analytics["course_titles"],
+        }
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
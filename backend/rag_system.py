@@ -56,6 +56,9 @@ class RAGSystem:
             # Add course content chunks to vector store
             self.vector_store.add_course_content(course_chunks)
 
+            # Cached tool results may now be stale
+            self._invalidate_tool_caches()
+
             return course, len(course_chunks)
         except Exception as e:
             print(f"Error processing course document {file_path}: {e}")
@@ -81,6 +84,7 @@ class RAGSystem:
         if clear_existing:
             print("Clearing existing data for fresh rebuild...")
             self.vector_store.clear_all_data()
+            self._invalidate_tool_caches()
 
         if not os.path.exists(folder_path):
             print(f"Folder {folder_path} does not exist")
@@ -117,8 +121,20 @@ class RAGSystem:
                 except Exception as e:
                     print(f"Error processing {file_name}: {e}")
 
+        # Cached tool results may now be stale
+        if total_courses:
+            self._invalidate_tool_caches()
+
+        # Preload course outlines so first requests skip the catalog lookup
+        self.outline_tool.warm_cache()
+
         return total_courses, total_chunks
 
+    def _invalidate_tool_caches(self):
+        """Drop cached tool results after the vector store has been modified"""
+        self.search_tool.invalidate()
+        self.outline_tool.invalidate()
+
     def query(
         self, query: str, session_id: Optional[str] = None
     ) -> Tuple[str, List[str]]:
@@ -1,54 +1,353 @@
-from abc import ABC, abstractmethod
-from typing import Any, Dict, Optional, Protocol
-
+import json
+import threading
+import time
+from array import array
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from operator import itemgetter
+from typing import (
+    Any,
+    Dict,
+    Hashable,
+    List,
+    NamedTuple,
+    Optional,
+    Protocol,
+    Sequence,
+    Tuple,
+    Union,
+    runtime_checkable,
+)
+
+import numpy as np
 from vector_store import SearchResults, VectorStore
 
+# Fetches (course_title, lesson_number) from a content chunk's metadata in C
+_course_lesson_key = itemgetter("course_title", "lesson_number")
+
+
+class LessonMeta(NamedTuple):
+    """Lesson entry as stored in the course catalog's lessons_json"""
+
+    lesson_number: Union[int, str]  # "?" when the catalog entry has none
+    lesson_title: str
+    lesson_link: Optional[str] = None
+
+
+def _decode_lessons(lessons_json: str) -> List[LessonMeta]:
+    """Parse lessons_json into LessonMeta tuples sorted by lesson number"""
+    lessons = sorted(
+        json.loads(lessons_json), key=lambda lesson: lesson.get("lesson_number", 0)
+    )
+    return [
+        LessonMeta(
+            lesson.get("lesson_number", "?"),
+            lesson.get("lesson_title", "Unknown Lesson"),
+            lesson.get("lesson_link"),
+        )
+        for lesson in lessons
+    ]
+
+
+class QueryCache:
+    """Thread-safe LRU cache with per-entry TTL for tool results.
+
+    Entries are spread over independently locked shards so concurrent
+    requests rarely contend on the same lock; LRU eviction is per shard.
+    max_size is an upper bound split evenly across shards, so a shard can
+    start evicting before the whole cache is full when keys hash unevenly.
+    """
+
+    SHARDS = 16
+
+    def __init__(
+        self, max_size: int = 2000, ttl_seconds: float = 300, shards: int = SHARDS
+    ):
+        if shards < 1 or shards & (shards - 1):
+            raise ValueError("shards must be a power of two")
+        if max_size < 1:
+            raise ValueError("max_size must be at least 1")
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        # Never spread fewer entries than shards, or capacity would exceed max_size
+        shards = min(shards, 1 << (max_size.bit_length() - 1))
+        self._mask = shards - 1
+        self._shard_size = max_size // shards
+        self._shards: "List[OrderedDict[Hashable, Tuple[float, Any]]]" = [
+            OrderedDict() for _ in range(shards)
+        ]
+        self._locks = [threading.RLock() for _ in range(shards)]
+        # Per-shard counters, only written while holding that shard's lock
+        self._hits = array("L", [0] * shards)
+        self._misses = array("L", [0] * shards)
+        self._evictions = array("L", [0] * shards)
+
+    @property
+    def hits(self) -> int:
+        return sum(self._hits)
+
+    @property
+    def misses(self) -> int:
+        return sum(self._misses)
+
+    @property
+    def evictions(self) -> int:
+        return sum(self._evictions)
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return the cached value for key, or None if missing or expired"""
+        shard = hash(key) & self._mask
+        entries = self._shards[shard]
+        with self._locks[shard]:
+            entry = entries.get(key)
+            if entry is None:
+                self._misses[shard] += 1
+                return None
+
+            expires_at, value = entry
+            # Inclusive, so a TTL of 0 expires immediately
+            if expires_at <= time.monotonic():
+                del entries[key]
+                self._misses[shard] += 1
+                return None
+
+            # Mark as most recently used
+            entries.move_to_end(key)
+            self._hits[shard] += 1
+            return value
+
+    def put(self, key: Hashable, value: Any):
+        """Store value under key, evicting the least recently used entries"""
+        shard = hash(key) & self._mask
+        entries = self._shards[shard]
+        with self._locks[shard]:
+            entries[key] = (time.monotonic() + self.ttl_seconds, value)
+            entries.move_to_end(key)
+            while len(entries) > self._shard_size:
+                entries.popitem(last=False)
+                self._evictions[shard] += 1
+
+    def invalidate_all(self):
+        """Drop every cached entry"""
+        for entries, lock in zip(self._shards, self._locks):
+            with lock:
+                entries.clear()
+
+    def __len__(self) -> int:
+        return sum(len(entries) for entries in self._shards)
+
+
+class _SemanticPartition:
+    """Ring buffer of one partition's normalized embeddings, expiries and values.
+
+    Capacity doubles up to max_entries, so inserts copy the embeddings only
+    O(log max_entries) times; once full, the oldest slot is overwritten.
+    """
+
+    __slots__ = ("matrix", "expires", "values", "size", "next")
+
+    def __init__(self, dim: int, capacity: int):
+        self.matrix = np.zeros((capacity, dim), dtype=np.float32)
+        self.expires = np.full(capacity, -np.inf)
+        self.values: List[Any] = [None] * capacity
+        self.size = 0
+        self.next = 0  # Slot the next entry is written to
+
+    def grow(self, capacity: int):
+        """Enlarge a buffer that has filled up without wrapping around yet"""
+        matrix = np.zeros((capacity, self.matrix.shape[1]), dtype=np.float32)
+        matrix[: self.size] = self.matrix
+        expires = np.full(capacity, -np.inf)
+        expires[: self.size] = self.expires
+        self.matrix, self.expires = matrix, expires
+        self.values.extend([None] * (capacity - self.size))
+        self.next = self.size
+
+    def append(self, vector: np.ndarray, expires_at: float, value: Any):
+        """Store an entry, overwriting the oldest one when the buffer is full"""
+        slot = self.next
+        self.matrix[slot] = vector
+        self.expires[slot] = expires_at
+        self.values[slot] = value
+        self.next = (slot + 1) % len(self.values)
+        self.size = min(self.size + 1, len(self.values))
+
+
+class SemanticQueryCache:
+    """Similarity cache that serves results for near-duplicate queries.
+
+    Query embeddings are L2-normalized and stored per partition (e.g. the
+    search filters), so a lookup is a single matrix-vector product against
+    the cached embeddings of that partition. Entries expire after
+    ttl_seconds and the least recently used partitions are evicted.
+
+    At most max_partitions * max_entries embeddings are held: with the
+    defaults and 384-dimensional float32 embeddings that is about 25 MB.
+    """
+
+    INITIAL_CAPACITY = 16
+
+    def __init__(
+        self,
+        threshold: float = 0.97,
+        max_entries: int = 256,
+        ttl_seconds: float = 300,
+        max_partitions: int = 64,
+    ):
+        self.threshold = threshold  # Minimum cosine similarity for a hit
+        self.max_entries = max_entries  # Per partition, oldest evicted first
+        self.ttl_seconds = ttl_seconds
+        self.max_partitions = max_partitions
+        self._partitions: "OrderedDict[Hashable, _SemanticPartition]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _normalize(embedding: Sequence[float]) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32).ravel()
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def get(self, partition: Hashable, embedding: Sequence[float]) -> Optional[Any]:
+        """Return the value cached for the most similar query, if close enough"""
+        query = self._normalize(embedding)
+        with self._lock:
+            cached = self._partitions.get(partition)
+            # Embeddings of another dimension (e.g. a new model) never match
+            if cached is not None and cached.matrix.shape[1] == query.size:
+                size = cached.size
+                scores = cached.matrix[:size] @ query
+                expired = cached.expires[:size] <= time.monotonic()
+                if expired.all():
+                    del self._partitions[partition]
+                else:
+                    scores[expired] = -np.inf
+                    best = int(scores.argmax())
+                    self._partitions.move_to_end(partition)
+                    if scores[best] >= self.threshold:
+                        self.hits += 1
+                        return cached.values[best]
+            self.misses += 1
+            return None
 
-class Tool(ABC):
-    """Abstract base class for all tools"""
+    def put(self, partition: Hashable, embedding: Sequence[float], value: Any):
+        """Cache value for the given query embedding"""
+        query = self._normalize(embedding)
+        expires_at = time.monotonic() + self.ttl_seconds
+        with self._lock:
+            cached = self._partitions.get(partition)
+            if cached is None or cached.matrix.shape[1] != query.size:
+                # Entries of another dimension could never match again
+                cached = _SemanticPartition(
+                    query.size, min(self.INITIAL_CAPACITY, self.max_entries)
+                )
+                self._partitions[partition] = cached
+            elif cached.size == len(cached.values) and cached.size < self.max_entries:
+                cached.grow(min(2 * cached.size, self.max_entries))
+            cached.append(query, expires_at, value)
+            self._partitions.move_to_end(partition)
+            while len(self._partitions) > self.max_partitions:
+                self._partitions.popitem(last=False)
+
+    def invalidate_all(self):
+        """Drop every cached entry"""
+        with self._lock:
+            self._partitions.clear()
+
+
+@dataclass(frozen=True, slots=True)
+class ToolOutput:
+    """Result of a tool call: text for Claude plus the sources behind it"""
+
+    text: str
+    sources: List[Dict[str, Any]]
+
+
+class Tool(Protocol):
+    """Interface for all tools, satisfied structurally by any matching class"""
 
-    @abstractmethod
     def get_tool_definition(self) -> Dict[str, Any]:
         """Return Anthropic tool definition for this tool"""
-        pass
+        ...
 
-    @abstractmethod
     def execute(self, **kwargs) -> str:
         """Execute the tool with given parameters"""
-        pass
+        ...
 
 
-class CourseSearchTool(Tool):
+@runtime_checkable
+class SourceTracker(Protocol):
+    """Tool that records the sources used by its last execution"""
+
+    last_sources: list
+
+
+def is_structured_tool(tool: Any) -> bool:
+    """Whether tool returns its text and sources together as a ToolOutput.
+
+    Tools opt in by setting STRUCTURED_OUTPUT = True; ToolManager then calls
+    run_structured() instead of execute(), and run_structured_cached() if
+    the tool defines it. Only a literal True counts, so any other value
+    keeps the plain execute() contract.
+    """
+    return getattr(tool, "STRUCTURED_OUTPUT", False) is True
+
+
+class CourseSearchTool:
     """Tool for searching course content with semantic course name matching"""
 
-    def __init__(self, vector_store: VectorStore):
+    # Static Anthropic tool definition, shared by all instances
+    _TOOL_DEF: Dict[str, Any] = {
+        "name": "search_course_content",
+        "description": "Search course materials with smart course name matching and lesson filtering",
+        "input_schema": {
+            "type": "object",
+            "properties": {
+                "query": {
+                    "type": "string",
+                    "description": "What to search for in the course content",
+                },
+                "course_name": {
+                    "type": "string",
+                    "description": "Course title (partial matches work, e.g. 'MCP', 'Introduction')",
+                },
+                "lesson_number": {
+                    "type": "integer",
+                    "description": "Specific lesson number to search within (e.g. 1, 2, 3)",
+                },
+            },
+            "required": ["query"],
+        },
+    }
+
+    # Maximum number of distinct source dicts kept for reuse
+    SOURCE_POOL_SIZE = 4096
+
+    # Returns ToolOutput from run_structured() for ToolManager
+    STRUCTURED_OUTPUT = True
+
+    def __init__(
+        self,
+        vector_store: VectorStore,
+        cache_size: int = 2000,
+        cache_ttl: float = 300,
+    ):
         self.store = vector_store
         self.last_sources = []  # Track sources from last search
+        # Cache of ToolOutput keyed by the search parameters
+        self._cache = QueryCache(max_size=cache_size, ttl_seconds=cache_ttl)
+        # Fallback cache matching rephrasings of previous queries
+        self._semantic_cache = SemanticQueryCache(ttl_seconds=cache_ttl)
+        # Shared source dicts keyed by (course title, lesson number); callers
+        # must treat sources as read-only
+        self._source_pool: Dict[Tuple[str, Optional[int]], Dict[str, Any]] = {}
+        self._source_pool_lock = threading.Lock()
 
     def get_tool_definition(self) -> Dict[str, Any]:
         """Return Anthropic tool definition for this tool"""
-        return {
-            "name": "search_course_content",
-            "description": "Search course materials with smart course name matching and lesson filtering",
-            "input_schema": {
-                "type": "object",
-                "properties": {
-                    "query": {
-                        "type": "string",
-                        "description": "What to search for in the course content",
-                    },
-                    "course_name": {
-                        "type": "string",
-                        "description": "Course title (partial matches work, e.g. 'MCP', 'Introduction')",
-                    },
-                    "lesson_number": {
-                        "type": "integer",
-                        "description": "Specific lesson number to search within (e.g. 1, 2, 3)",
-                    },
-                },
-                "required": ["query"],
-            },
-        }
+        return self._TOOL_DEF
 
     def execute(
         self,
@@ -67,15 +366,46 @@ class CourseSearchTool(Tool):
         Returns:
             Formatted search results or error message
         """
+        output = self.run_structured(query, course_name, lesson_number)
+        self.last_sources = list(output.sources)
+        return output.text
+
+    def run_structured(
+        self,
+        query: str,
+        course_name: Optional[str] = None,
+        lesson_number: Optional[int] = None,
+    ) -> ToolOutput:
+        """Search like execute() but return the sources instead of storing them"""
+        # Serve repeated searches from the cache
+        cached = self.run_structured_cached(query, course_name, lesson_number)
+        if cached is not None:
+            return cached
+
+        # Embed once for both the similarity lookup and the content search
+        key = (query, course_name, lesson_number)
+        filters = (course_name, lesson_number)
+        try:
+            query_embedding = self.store.embed_query(query)
+            cached = self._semantic_cache.get(filters, query_embedding)
+        except Exception as e:
+            return ToolOutput(f"Search error: {str(e)}", [])
+
+        # Served as is: copying into the exact cache would extend its lifetime
+        if cached is not None:
+            return cached
 
         # Use the vector store's unified search interface
         results = self.store.search(
-            query=query, course_name=course_name, lesson_number=lesson_number
+            query=query,
+            course_name=course_name,
+            lesson_number=lesson_number,
+            query_embedding=query_embedding,
         )
 
-        # Handle errors
+        # Handle errors (not cached so transient failures are retried)
         if results.error:
-            return results.error
+            return ToolOutput(results.error, [])
 
         # Handle empty results
         if results.is_empty():
@@ -84,69 +414,147 @@ class CourseSearchTool(Tool):
                 filter_info += f" in course '{course_name}'"
             if lesson_number:
                 filter_info += f" in lesson {lesson_number}"
-            return f"No relevant content found{filter_info}."
+            output = ToolOutput(f"No relevant content found{filter_info}.", [])
+            self._remember(key, query_embedding, output)
+            return output
 
-        # Format and return results
-        return self._format_results(results)
+        # Format, cache and return results
+        output = self._format_results(results)
+        self._remember(key, query_embedding, output)
+        return output
 
-    def _format_results(self, results: SearchResults) -> str:
-        """Format search results with course and lesson context"""
-        formatted = []
-        sources = []  # Track sources for the UI
-
-        for doc, meta in zip(results.documents, results.metadata):
-            course_title = meta.get("course_title", "unknown")
-            lesson_num = meta.get("lesson_number")
-
-            # Build context header
-            header = f"[{course_title}"
-            if lesson_num is not None:
-                header += f" - Lesson {lesson_num}"
-            header += "]"
+    def run_structured_cached(
+        self,
+        query: str,
+        course_name: Optional[str] = None,
+        lesson_number: Optional[int] = None,
+    ) -> Optional[ToolOutput]:
+        """Return the cached output for these parameters, or None on a miss"""
+        return self._cache.get((query, course_name, lesson_number))
 
-            # Track source for the UI with lesson link if available
-            source = course_title
-            lesson_link = None
-            if lesson_num is not None:
-                source += f" - Lesson {lesson_num}"
-                # Get lesson link from vector store
-                lesson_link = self.store.get_lesson_link(course_title, lesson_num)
+    def _remember(self, key: Tuple, query_embedding, entry: ToolOutput):
+        """Store a search result in both the exact and the similarity cache"""
+        self._cache.put(key, entry)
+        try:
+            self._semantic_cache.put(key[1:], query_embedding, entry)
+        except Exception as e:
+            # The exact cache already holds the result, so this is not fatal
+            print(f"Error caching search result by similarity: {e}")
 
-            # Create source object with link information
-            source_obj = {"text": source, "link": lesson_link}
-            sources.append(source_obj)
+    def invalidate(self):
+        """Drop cached search results, e.g. after the vector store changes"""
+        self._cache.invalidate_all()
+        self._semantic_cache.invalidate_all()
+        with self._source_pool_lock:
+            self._source_pool.clear()
 
-            formatted.append(f"{header}\n{doc}")
+    def _format_results(self, results: SearchResults) -> ToolOutput:
+        """Format search results with course and lesson context"""
+        count = len(results.documents)
+        formatted = [None] * count
+        sources = [None] * count  # Track sources for the UI
 
-        # Store sources for retrieval
-        self.last_sources = sources
+        try:
+            keys = list(map(_course_lesson_key, results.metadata))
+        except KeyError:
+            # Slow path for chunks stored without a lesson number
+            keys = [
+                (meta.get("course_title", "unknown"), meta.get("lesson_number"))
+                for meta in results.metadata
+            ]
+
+        # Reuse pooled source objects, fetching missing lesson links in one request
+        pool = self._source_pool
+        resolved = {key: pool.get(key) for key in keys}
+        missing = [
+            key
+            for key, source_obj in resolved.items()
+            if source_obj is None and key[1] is not None
+        ]
+        try:
+            lesson_links = self.store.get_lesson_links_bulk(missing) if missing else {}
+            make_source = self._intern_source
+        except Exception as e:
+            print(f"Error getting lesson links: {e}")
+            # Serve link-less sources this time, but keep them out of the pool
+            lesson_links, make_source = {}, self._build_source
+        for key, source_obj in resolved.items():
+            if source_obj is None:
+                resolved[key] = make_source(key, lesson_links.get(key))
+
+        for i, (doc, key) in enumerate(zip(results.documents, keys)):
+            source_obj = resolved[key]
+            sources[i] = source_obj
+            # Source label doubles as the context header
+            formatted[i] = f"[{source_obj['text']}]\n{doc}"
+
+        return ToolOutput("\n\n".join(formatted), sources)
+
+    @staticmethod
+    def _build_source(
+        key: Tuple[str, Optional[int]], lesson_link: Optional[str]
+    ) -> Dict[str, Any]:
+        """Build the source dict for a course/lesson"""
+        course_title, lesson_num = key
+        if lesson_num is not None:
+            return {
+                "text": f"{course_title} - Lesson {lesson_num}",
+                "link": lesson_link,
+            }
+        return {"text": course_title, "link": None}
+
+    def _intern_source(
+        self, key: Tuple[str, Optional[int]], lesson_link: Optional[str]
+    ) -> Dict[str, Any]:
+        """Build the source dict for a course/lesson and add it to the pool"""
+        source_obj = self._build_source(key, lesson_link)
+        with self._source_pool_lock:
+            pool = self._source_pool
+            if key not in pool and len(pool) >= self.SOURCE_POOL_SIZE:
+                # Evict the oldest entry (dicts keep insertion order)
+                del pool[next(iter(pool))]
+            return pool.setdefault(key, source_obj)
+
+
+class CourseOutlineTool:
+    """Tool for getting course outlines with title, link, and lesson structure"""
 
-        return "\n\n".join(formatted)
+    # Static Anthropic tool definition, shared by all instances
+    _TOOL_DEF: Dict[str, Any] = {
+        "name": "get_course_outline",
+        "description": "Get course outline including title, link, and complete lesson structure",
+        "input_schema": {
+            "type": "object",
+            "properties": {
+                "course_title": {
+                    "type": "string",
+                    "description": "Course title or partial match (e.g. 'MCP', 'Building', 'Anthropic')",
+                }
+            },
+            "required": ["course_title"],
+        },
+    }
 
+    # Returns ToolOutput from run_structured() for ToolManager
+    STRUCTURED_OUTPUT = True
 
-class CourseOutlineTool(Tool):
-    """Tool for getting course outlines with title, link, and lesson structure"""
+    # Maximum number of requested titles whose resolution is remembered
+    RESOLVE_CACHE_SIZE = 1024
 
     def __init__(self, vector_store: VectorStore):
         self.store = vector_store
         self.last_sources = []  # Track sources from last search
+        # Requested title -> resolved title; entries only go stale when the
+        # catalog changes, which calls invalidate()
+        self._resolve_cache = QueryCache(
+            max_size=self.RESOLVE_CACHE_SIZE, ttl_seconds=float("inf")
+        )
+        # Resolved title -> parsed metadata with lessons pre-sorted
+        self._meta_cache: Dict[str, Dict[str, Any]] = {}
 
     def get_tool_definition(self) -> Dict[str, Any]:
         """Return Anthropic tool definition for this tool"""
-        return {
-            "name": "get_course_outline",
-            "description": "Get course outline including title, link, and complete lesson structure",
-            "input_schema": {
-                "type": "object",
-                "properties": {
-                    "course_title": {
-                        "type": "string",
-                        "description": "Course title or partial match (e.g. 'MCP', 'Building', 'Anthropic')",
-                    }
-                },
-                "required": ["course_title"],
-            },
-        }
+        return self._TOOL_DEF
 
     def execute(self, course_title: str) -> str:
         """
@@ -158,40 +566,87 @@ class CourseOutlineTool(Tool):
         Returns:
             Formatted course outline or error message
         """
+        output = self.run_structured(course_title)
+        self.last_sources = list(output.sources)
+        return output.text
 
+    def run_structured(self, course_title: str) -> ToolOutput:
+        """Build the outline like execute() but return its source"""
         # Resolve course name using vector search
-        resolved_course = self.store._resolve_course_name(course_title)
+        resolved_course = self._resolve_cache.get(course_title)
+        if resolved_course is None:
+            resolved_course = self.store._resolve_course_name(course_title)
+            # Misses are not cached: the resolver also returns None on errors
+            if resolved_course:
+                self._resolve_cache.put(course_title, resolved_course)
         if not resolved_course:
-            return f"No course found matching '{course_title}'"
+            return ToolOutput(f"No course found matching '{course_title}'", [])
 
         # Get course metadata
         course_metadata = self._get_course_metadata(resolved_course)
         if not course_metadata:
-            return f"Course metadata not found for '{resolved_course}'"
+            return ToolOutput(f"Course metadata not found for '{resolved_course}'", [])
 
         # Format and return course outline
         return self._format_course_outline(course_metadata)
 
+    def invalidate(self):
+        """Drop cached course lookups, e.g. after the course catalog changes"""
+        self._resolve_cache.invalidate_all()
+        self._meta_cache.clear()
+
+    def warm_cache(self):
+        """Load and cache metadata for every course in a single catalog request"""
+        try:
+            results = self.store.course_catalog.get()
+        except Exception as e:
+            print(f"Error warming course metadata cache: {e}")
+            return
+
+        if not (results and "metadatas" in results and results["metadatas"]):
+            return
+
+        for metadata in results["metadatas"]:
+            # One malformed course must not keep the others out of the cache
+            try:
+                course_metadata = self._parse_course_metadata(metadata)
+            except Exception as e:
+                print(f"Error warming metadata for {metadata.get('title')!r}: {e}")
+                continue
+            title = course_metadata.get("title")
+            if title:
+                self._meta_cache[title] = course_metadata
+                # Exact titles resolve to themselves without a search
+                self._resolve_cache.put(title, title)
+
+    @staticmethod
+    def _parse_course_metadata(metadata: Dict[str, Any]) -> Dict[str, Any]:
+        """Copy catalog metadata, parsing lessons JSON and sorting lessons once"""
+        metadata = metadata.copy()
+        if "lessons_json" in metadata:
+            metadata["lessons"] = _decode_lessons(metadata["lessons_json"])
+            del metadata["lessons_json"]
+        return metadata
+
     def _get_course_metadata(self, course_title: str) -> Optional[Dict[str, Any]]:
         """Get metadata for a specific course"""
-        import json
+        cached = self._meta_cache.get(course_title)
+        if cached is not None:
+            return cached
 
         try:
             # Get course by ID (title is the ID)
             results = self.store.course_catalog.get(ids=[course_title])
             if results and "metadatas" in results and results["metadatas"]:
-                metadata = results["metadatas"][0].copy()
-                # Parse lessons JSON
-                if "lessons_json" in metadata:
-                    metadata["lessons"] = json.loads(metadata["lessons_json"])
-                    del metadata["lessons_json"]
+                metadata = self._parse_course_metadata(results["metadatas"][0])
+                self._meta_cache[course_title] = metadata
                 return metadata
             return None
         except Exception as e:
             print(f"Error getting course metadata: {e}")
             return None
 
-    def _format_course_outline(self, metadata: Dict[str, Any]) -> str:
+    def _format_course_outline(self, metadata: Dict[str, Any]) -> ToolOutput:
         """Format course outline from metadata"""
         course_title = metadata.get("title", "Unknown Course")
         course_link = metadata.get("course_link")
@@ -209,19 +664,12 @@ class CourseOutlineTool(Tool):
 
         outline += f"\n**Course Outline ({len(lessons)} lessons):**\n"
 
-        # Sort lessons by lesson number
-        sorted_lessons = sorted(lessons, key=lambda x: x.get("lesson_number", 0))
-
-        for lesson in sorted_lessons:
-            lesson_num = lesson.get("lesson_number", "?")
-            lesson_title = lesson.get("lesson_title", "Unknown Lesson")
-            outline += f"• Lesson {lesson_num}: {lesson_title}\n"
+        # Lessons are already sorted by lesson number
+        for lesson in lessons:
+            outline += f"• Lesson {lesson.lesson_number}: {lesson.lesson_title}\n"
 
         # Track source for the UI
-        source_obj = {"text": course_title, "link": course_link}
-        self.last_sources = [source_obj]
-
-        return outline
+        return ToolOutput(outline, [{"text": course_title, "link": course_link}])
 
 
 class ToolManager:
@@ -229,6 +677,14 @@ class ToolManager:
 
     def __init__(self):
         self.tools = {}
+        self._definitions = {}  # Tool definitions, built once per registration
+        self._definitions_list = []
+        self._source_tools = {}  # Registered tools that track last_sources
+        self._runners = {}  # run_structured() of tools returning ToolOutput
+        self._cached_runners = {}  # Tools able to answer from cache cheaply
+        self._source_locks = {}  # Guard execute + last_sources of other trackers
+        self._last_sources = []
+        self._sources_lock = threading.Lock()
 
     def register_tool(self, tool: Tool):
         """Register any tool that implements the Tool interface"""
@@ -237,28 +693,121 @@ class ToolManager:
         if not tool_name:
             raise ValueError("Tool must have a 'name' in its definition")
         self.tools[tool_name] = tool
+        self._definitions[tool_name] = tool_def
+        self._definitions_list = list(self._definitions.values())
+
+        # Detect optional capabilities once instead of on every query
+        for registry in (
+            self._source_tools,
+            self._runners,
+            self._cached_runners,
+            self._source_locks,
+        ):
+            registry.pop(tool_name, None)
+
+        if isinstance(tool, SourceTracker):
+            self._source_tools[tool_name] = tool
+        if is_structured_tool(tool):
+            self._runners[tool_name] = tool.run_structured
+            run_cached = getattr(tool, "run_structured_cached", None)
+            if run_cached is not None:
+                self._cached_runners[tool_name] = run_cached
+        elif tool_name in self._source_tools:
+            # Sources are read back from the tool, so serialize its calls
+            self._source_locks[tool_name] = threading.Lock()
 
     def get_tool_definitions(self) -> list:
-        """Get all tool definitions for Anthropic tool calling"""
-        return [tool.get_tool_definition() for tool in self.tools.values()]
+        """
+        Get all tool definitions for Anthropic tool calling.
+
+        The returned list is shared between calls and must not be mutated.
+        """
+        return self._definitions_list
 
     def execute_tool(self, tool_name: str, **kwargs) -> str:
         """Execute a tool by name with given parameters"""
-        if tool_name not in self.tools:
-            return f"Tool '{tool_name}' not found"
+        return self._collect([self._execute(tool_name, kwargs)])[0]
+
+    def execute_tools(self, calls: List[Tuple[str, Dict[str, Any]]]) -> List[str]:
+        """
+        Execute independent tool calls concurrently.
 
-        return self.tools[tool_name].execute(**kwargs)
+        Args:
+            calls: (tool name, parameters) pairs
+
+        Returns:
+            Tool results in the same order as calls
+        """
+        outcomes, pending = self._execute_cached_calls(calls)
+        if len(pending) == 1:
+            index = pending[0]
+            outcomes[index] = self._execute(*calls[index])
+        elif pending:
+            with ThreadPoolExecutor(max_workers=len(pending)) as pool:
+                results = pool.map(lambda index: self._execute(*calls[index]), pending)
+                for index, outcome in zip(pending, results):
+                    outcomes[index] = outcome
+        return self._collect(outcomes)
+
+    def _execute(
+        self, tool_name: str, kwargs: Dict[str, Any], cached_only: bool = False
+    ) -> Tuple[Optional[str], Optional[list]]:
+        """Run one tool call, returning its result and the sources it produced"""
+        tool = self.tools.get(tool_name)
+        if tool is None:
+            return f"Tool '{tool_name}' not found", None
+
+        runners = self._cached_runners if cached_only else self._runners
+        run = runners.get(tool_name)
+        if run is not None:
+            output = run(**kwargs)
+            if output is None:
+                return None, None
+            return output.text, output.sources
+
+        lock = self._source_locks.get(tool_name)
+        if lock is None:
+            return tool.execute(**kwargs), None
+
+        # Hold the tool's lock so a concurrent call cannot swap its sources
+        with lock:
+            result = tool.execute(**kwargs)
+            return result, list(tool.last_sources)
+
+    def _execute_cached_calls(
+        self, calls: List[Tuple[str, Dict[str, Any]]]
+    ) -> Tuple[list, List[int]]:
+        """Answer cache hits synchronously and return the indices still pending"""
+        outcomes = [None] * len(calls)
+        pending = []
+        for index, (tool_name, kwargs) in enumerate(calls):
+            if tool_name in self._cached_runners:
+                outcome = self._execute(tool_name, kwargs, cached_only=True)
+                if outcome[0] is not None:
+                    outcomes[index] = outcome
+                    continue
+            pending.append(index)
+        return outcomes, pending
+
+    def _collect(self, outcomes: List[Tuple[str, Optional[list]]]) -> List[str]:
+        """Record the merged sources of executed calls and return their results"""
+        merged = None
+        for _, sources in outcomes:
+            if sources is not None:
+                merged = (merged or []) + sources
+
+        if merged is not None:
+            with self._sources_lock:
+                self._last_sources = merged
+        return [result for result, _ in outcomes]
 
     def get_last_sources(self) -> list:
         """Get sources from the last search operation"""
-        # Check all tools for last_sources attribute
-        for tool in self.tools.values():
-            if hasattr(tool, "last_sources") and tool.last_sources:
-                return tool.last_sources
-        return []
+        return self._last_sources
 
     def reset_sources(self):
         """Reset sources from all tools that track sources"""
-        for tool in self.tools.values():
-            if hasattr(tool, "last_sources"):
-                tool.last_sources = []
+        for tool in self._source_tools.values():
+            tool.last_sources = []
+        with self._sources_lock:
+            self._last_sources = []
@@ -0,0 +1,29 @@
+"""
+Canned RAGSystem mock responses shared by the test fixtures.
+"""
+
+
+def configure_mock_rag(mock_rag):
+    """Apply the canned RAGSystem responses shared by the test fixtures."""
+    # Mock session manager
+    mock_rag.session_manager.create_session.return_value = "test-session-123"
+
+    # Mock query method
+    mock_rag.query.return_value = (
+        "This is a test response from the RAG system.",
+        [
+            {
+                "text": "Test Course - Introduction",
+                "link": "https://example.com/lesson-0",
+            }
+        ],
+    )
+
+    # Mock analytics method
+    mock_rag.get_course_analytics.return_value = {
+        "total_courses": 1,
+        "course_titles": ["Test Course"],
+    }
+
+    # Mock add_course_folder method
+    mock_rag.add_course_folder.return_value = (1, 2)  # 1 course, 2 chunks
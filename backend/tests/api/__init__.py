@@ -0,0 +1,3 @@
+"""
+API endpoint tests for the RAG system.
+"""
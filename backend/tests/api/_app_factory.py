@@ -0,0 +1,95 @@
+"""
+Minimal FastAPI app mirroring the production API routes for endpoint tests.
+
+Models are defined at module scope so they are created once per test
+process; build_app() stores the RAG system on app.state and the routes
+receive it through the get_rag_system dependency, which tests can replace
+via app.dependency_overrides.
+"""
+
+from typing import List, Optional
+
+from fastapi import Depends, FastAPI, HTTPException, Request
+from fastapi.middleware.cors import CORSMiddleware
+from pydantic import BaseModel
+
+
+class QueryRequest(BaseModel):
+    query: str
+    session_id: Optional[str] = None
+
+
+class SourceCitation(BaseModel):
+    text: str
+    link: Optional[str] = None
+
+
+class QueryResponse(BaseModel):
+    answer: str
+    sources: List[SourceCitation]
+    session_id: str
+
+
+class CourseStats(BaseModel):
+    total_courses: int
+    course_titles: List[str]
+
+
+async def get_rag_system(request: Request):
+    """Dependency returning the RAG system the app was built with."""
+    return request.app.state.rag_system
+
+
+def build_app(rag_system) -> FastAPI:
+    """Create the test app with routes delegating to rag_system."""
+    app = FastAPI(title="Test RAG API")
+    app.state.rag_system = rag_system
+
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=["*"],
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
+
+    @app.post("/api/query", response_model=QueryResponse)
+    async def query_documents(
+        request: QueryRequest, rag_system=Depends(get_rag_system)
+    ):
+        try:
+            session_id = request.session_id
+            if not session_id:
+                session_id = rag_system.session_manager.create_session()
+
+            answer, sources = rag_system.query(request.query, session_id)
+
+            formatted_sources = []
+            for source in sources:
+                if isinstance(source, dict):
+                    formatted_sources.append(
+                        {"text": source.get("text", ""), "link": source.get("link")}
+                    )
+                else:
+                    formatted_sources.append({"text": str(source), "link": None})
+
+            return {
+                "answer": answer,
+                "sources": formatted_sources,
+                "session_id": session_id,
+            }
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=str(e))
+
+    @app.get("/api/courses", response_model=CourseStats)
+    async def get_course_stats(rag_system=Depends(get_rag_system)):
+        try:
+            analytics = rag_system.get_course_analytics()
+            return {
+                "total_courses": analytics["total_courses"],
+                "course_titles": analytics["course_titles"],
+            }
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=str(e))
+
+    return app
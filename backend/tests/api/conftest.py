@@ -0,0 +1,61 @@
+"""
+Fixtures for the FastAPI endpoint tests.
+
+Kept out of the shared conftest, and FastAPI, Starlette and httpx are
+only imported inside fixtures, so collecting this package (e.g. for a
+`-m unit` run that deselects it) never loads them.
+"""
+
+from unittest.mock import Mock
+
+import pytest
+
+from .._rag_mock import configure_mock_rag
+
+
+@pytest.fixture(scope="session")
+def _test_app():
+    """Build the test app once, backed by a reusable RAG mock."""
+    from ._app_factory import build_app
+
+    # Routes delegate to this mock; it is reset before each test
+    mock_rag_system = Mock()
+    return build_app(mock_rag_system), mock_rag_system
+
+
+@pytest.fixture(autouse=True)
+def _reset_test_app_mock(request):
+    """Restore the shared app's RAG mock before each test that uses the client."""
+    if "test_client" in request.fixturenames:
+        _, mock_rag = request.getfixturevalue("_test_app")
+        mock_rag.reset_mock(return_value=True, side_effect=True)
+        configure_mock_rag(mock_rag)
+
+
+@pytest.fixture(scope="session")
+def test_client(_test_app):
+    """Create a test client for the shared inline app."""
+    from fastapi.testclient import TestClient
+
+    app, mock_rag = _test_app
+
+    # Enter the client once so the app's lifespan runs once per session
+    with TestClient(app) as client:
+        # Attach mock for test access
+        client.mock_rag = mock_rag
+        yield client
+
+
+@pytest.fixture
+def override_rag_system(test_client):
+    """Route the app's requests to another RAG system for a single test."""
+    from ._app_factory import get_rag_system
+
+    overrides = test_client.app.dependency_overrides
+
+    def _override(rag_system):
+        overrides[get_rag_system] = lambda: rag_system
+
+    yield _override
+    # Teardown runs even when the test fails
+    overrides.clear()
@@ -2,10 +2,13 @@
 API endpoint tests for the RAG system FastAPI application.
 """
 
+from http import HTTPStatus
 from unittest.mock import Mock, patch
 
 import pytest
-from fastapi import status
+
+# Origin sent with cross-origin requests so CORSMiddleware responds
+ORIGIN = "http://testserver"
 
 
 @pytest.mark.api
@@ -18,7 +21,7 @@ class TestQueryEndpoint:
             "/api/query", json={"query": "What is this course about?"}
         )
 
-        assert response.status_code == status.HTTP_200_OK
+        assert response.status_code == HTTPStatus.OK
         data = response.json()
 
         assert "answer" in data
@@ -45,7 +48,7 @@ class TestQueryEndpoint:
             },
         )
 
-        assert response.status_code == status.HTTP_200_OK
+        assert response.status_code == HTTPStatus.OK
         data = response.json()
 
         assert data["session_id"] == session_id
@@ -60,7 +63,7 @@ class TestQueryEndpoint:
         """Test the structure of the query response."""
         response = test_client.post("/api/query", json={"query": "Sample query"})
 
-        assert response.status_code == status.HTTP_200_OK
+        assert response.status_code == HTTPStatus.OK
         data = response.json()
 
         # Verify response structure
@@ -86,7 +89,7 @@ class TestQueryEndpoint:
 
         response = test_client.post("/api/query", json={"query": "Test query"})
 
-        assert response.status_code == status.HTTP_200_OK
+        assert response.status_code == HTTPStatus.OK
         data = response.json()
 
         sources = data["sources"]
@@ -104,7 +107,7 @@ class TestQueryEndpoint:
 
         response = test_client.post("/api/query", json={"query": "Test query"})
 
-        assert response.status_code == status.HTTP_200_OK
+        assert response.status_code == HTTPStatus.OK
         data = response.json()
 
         sources = data["sources"]
@@ -118,29 +121,31 @@ class TestQueryEndpoint:
         """Test query with empty string."""
         response = test_client.post("/api/query", json={"query": ""})
 
-        assert response.status_code == status.HTTP_200_OK
+        assert response.status_code == HTTPStatus.OK
         test_client.mock_rag.query.assert_called_with("", "test-session-123")
 
     def test_query_missing_field(self, test_client):
         """Test query request with missing query field."""
         response = test_client.post("/api/query", json={})
 
-        assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+        assert response.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
 
     def test_query_invalid_json(self, test_client):
         """Test query with invalid JSON."""
         response = test_client.post("/api/query", data="invalid json")
 
-        assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+        assert response.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
 
-    def test_query_exception_handling(self, test_client):
+    def test_query_exception_handling(self, test_client, override_rag_system):
         """Test query endpoint exception handling."""
-        # Mock RAG system to raise exception
-        test_client.mock_rag.query.side_effect = Exception("Test error")
+        # Inject a RAG system that raises, leaving the shared mock untouched
+        failing = Mock()
+        failing.query.side_effect = Exception("Test error")
+        override_rag_system(failing)
 
         response = test_client.post("/api/query", json={"query": "Test query"})
 
-        assert response.status_code == status.HTTP_500_INTERNAL_SERVER_ERROR
+        assert response.status_code == HTTPStatus.INTERNAL_SERVER_ERROR
         assert "Test error" in response.json()["detail"]
 
 
@@ -152,7 +157,7 @@ class TestCoursesEndpoint:
         """Test successful retrieval of course statistics."""
         response = test_client.get("/api/courses")
 
-        assert response.status_code == status.HTTP_200_OK
+        assert response.status_code == HTTPStatus.OK
         data = response.json()
 
         assert "total_courses" in data
@@ -171,21 +176,21 @@ class TestCoursesEndpoint:
 
         response = test_client.get("/api/courses")
 
-        assert response.status_code == status.HTTP_200_OK
+        assert response.status_code == HTTPStatus.OK
         data = response.json()
 
         assert data["total_courses"] == 0
         assert data["course_titles"] == []
 
-    def test_get_courses_exception_handling(self, test_client):
+    def test_get_courses_exception_handling(self, test_client, override_rag_system):
         """Test courses endpoint exception handling."""
-        test_client.mock_rag.get_course_analytics.side_effect = Exception(
-            "Analytics error"
-        )
+        failing = Mock()
+        failing.get_course_analytics.side_effect = Exception("Analytics error")
+        override_rag_system(failing)
 
         response = test_client.get("/api/courses")
 
-        assert response.status_code == status.HTTP_500_INTERNAL_SERVER_ERROR
+        assert response.status_code == HTTPStatus.INTERNAL_SERVER_ERROR
         assert "Analytics error" in response.json()["detail"]
 
 
@@ -195,16 +200,22 @@ class TestCORSAndMiddleware:
 
     def test_cors_headers_present(self, test_client):
         """Test that CORS headers are present in responses."""
-        response = test_client.get("/api/courses")
+        # CORSMiddleware only answers cross-origin requests
+        response = test_client.get("/api/courses", headers={"Origin": ORIGIN})
 
         # Check common CORS headers
         assert "access-control-allow-origin" in response.headers
 
     def test_options_request(self, test_client):
         """Test OPTIONS preflight request handling."""
-        response = test_client.options("/api/query")
+        # Without the preflight headers the route itself answers with a 405
+        response = test_client.options(
+            "/api/query",
+            headers={"Origin": ORIGIN, "Access-Control-Request-Method": "POST"},
+        )
 
-        assert response.status_code in [status.HTTP_200_OK, status.HTTP_204_NO_CONTENT]
+        assert response.status_code in [HTTPStatus.OK, HTTPStatus.NO_CONTENT]
+        assert "POST" in response.headers["access-control-allow-methods"]
 
 
 @pytest.mark.api
@@ -215,34 +226,34 @@ class TestRequestValidation:
         """Test various query request validation scenarios."""
         # Valid minimal request
         response = test_client.post("/api/query", json={"query": "test"})
-        assert response.status_code == status.HTTP_200_OK
+        assert response.status_code == HTTPStatus.OK
 
         # Valid request with session_id
         response = test_client.post(
             "/api/query", json={"query": "test", "session_id": "custom-session"}
         )
-        assert response.status_code == status.HTTP_200_OK
+        assert response.status_code == HTTPStatus.OK
 
         # Valid request with None session_id (should create new)
         response = test_client.post(
             "/api/query", json={"query": "test", "session_id": None}
         )
-        assert response.status_code == status.HTTP_200_OK
+        assert response.status_code == HTTPStatus.OK
 
     def test_invalid_http_methods(self, test_client):
         """Test invalid HTTP methods on endpoints."""
         # GET on query endpoint (should be POST)
         response = test_client.get("/api/query")
-        assert response.status_code == status.HTTP_405_METHOD_NOT_ALLOWED
+        assert response.status_code == HTTPStatus.METHOD_NOT_ALLOWED
 
         # POST on courses endpoint (should be GET)
         response = test_client.post("/api/courses", json={})
-        assert response.status_code == status.HTTP_405_METHOD_NOT_ALLOWED
+        assert response.status_code == HTTPStatus.METHOD_NOT_ALLOWED
 
     def test_nonexistent_endpoints(self, test_client):
         """Test requests to non-existent endpoints."""
         response = test_client.get("/api/nonexistent")
-        assert response.status_code == status.HTTP_404_NOT_FOUND
+        assert response.status_code == HTTPStatus.NOT_FOUND
 
         response = test_client.post("/api/invalid")
-        assert response.status_code == status.HTTP_404_NOT_FOUND
+        assert response.status_code == HTTPStatus.NOT_FOUND
@@ -0,0 +1,84 @@
+"""
+Demonstration tests showing the API testing capabilities.
+"""
+
+import json
+from http import HTTPStatus
+from unittest.mock import Mock
+
+import pytest
+
+# Request bodies serialized once and posted as raw bytes
+JSON_HEADERS = {"content-type": "application/json"}
+BODY_BASIC = json.dumps({"query": "What can you tell me about this course?"}).encode()
+BODY_GREETING = json.dumps({"query": "Hello, can you help me?"}).encode()
+BODY_FAILING = json.dumps({"query": "This should fail"}).encode()
+
+
+def _post_query(client, body: bytes):
+    """POST a pre-serialized body to the query endpoint."""
+    return client.post("/api/query", content=body, headers=JSON_HEADERS)
+
+
+@pytest.mark.api
+class TestDemoAPI:
+    """Demo tests showing API testing capabilities."""
+
+    def test_api_query_basic_functionality(self, test_client):
+        """Demo: Test basic query functionality."""
+        response = _post_query(test_client, BODY_BASIC)
+
+        assert response.status_code == HTTPStatus.OK
+        data = response.json()
+
+        # Verify response structure
+        assert "answer" in data
+        assert "sources" in data
+        assert "session_id" in data
+
+        # Verify sources are properly formatted
+        if data["sources"]:
+            source = data["sources"][0]
+            assert "text" in source
+            assert "link" in source
+
+    def test_api_courses_analytics(self, test_client):
+        """Demo: Test course analytics endpoint."""
+        response = test_client.get("/api/courses")
+
+        assert response.status_code == HTTPStatus.OK
+        data = response.json()
+
+        assert "total_courses" in data
+        assert "course_titles" in data
+        assert isinstance(data["total_courses"], int)
+        assert isinstance(data["course_titles"], list)
+
+    def test_session_continuity(self, test_client):
+        """Demo: Test session continuity across multiple requests."""
+        # First request
+        response1 = _post_query(test_client, BODY_GREETING)
+
+        assert response1.status_code == HTTPStatus.OK
+        session_id = response1.json()["session_id"]
+
+        # Second request with same session
+        response2 = test_client.post(
+            "/api/query",
+            json={"query": "What did I just ask you?", "session_id": session_id},
+        )
+
+        assert response2.status_code == HTTPStatus.OK
+        assert response2.json()["session_id"] == session_id
+
+    def test_error_handling(self, test_client, override_rag_system):
+        """Demo: Test error handling."""
+        # Test with a failing RAG system injected for this request only
+        failing = Mock()
+        failing.query.side_effect = Exception("Mock error")
+        override_rag_system(failing)
+
+        response = _post_query(test_client, BODY_FAILING)
+
+        assert response.status_code == HTTPStatus.INTERNAL_SERVER_ERROR
+        assert "Mock error" in response.json()["detail"]
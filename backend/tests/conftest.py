@@ -2,39 +2,83 @@
 Shared test fixtures and configuration for the RAG system tests.
 """
 
+import json
 import os
 import shutil
+import sys
 import tempfile
+from contextlib import ExitStack
 from pathlib import Path
-from unittest.mock import AsyncMock, Mock, patch
+from types import ModuleType, SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, Mock, patch
 
 import pytest
-from fastapi.testclient import TestClient
+
+from ._rag_mock import configure_mock_rag
+
+
+def _stub_module(name, **attrs):
+    """Register a lightweight stand-in for a heavy module unless already loaded."""
+    module = ModuleType(name)
+    module.__dict__.update(attrs)
+    return sys.modules.setdefault(name, module)
+
+
+# Stub heavy third-party packages before any application module imports them;
+# tests patch the classes they use, so the real installs are never needed
+_chromadb_config = _stub_module("chromadb.config", Settings=MagicMock())
+_chromadb_embedding_functions = _stub_module(
+    "chromadb.utils.embedding_functions",
+    SentenceTransformerEmbeddingFunction=MagicMock(),
+)
+_chromadb_utils = _stub_module(
+    "chromadb.utils", embedding_functions=_chromadb_embedding_functions
+)
+_stub_module(
+    "chromadb",
+    PersistentClient=MagicMock(),
+    config=_chromadb_config,
+    utils=_chromadb_utils,
+)
+_stub_module("anthropic", Anthropic=MagicMock())
+_stub_module("sentence_transformers", SentenceTransformer=MagicMock())
+
+
+FIXTURES_DIR = Path(__file__).parent / "fixtures"
+
+
+@pytest.fixture(scope="session")
+def anthropic_canned():
+    """Canned Anthropic message loaded once from disk; treat as read-only."""
+    with open(FIXTURES_DIR / "anthropic_response.json", encoding="utf-8") as f:
+        return json.load(f, object_hook=lambda fields: SimpleNamespace(**fields))
 
 
 @pytest.fixture
-def mock_anthropic_api():
+def mock_anthropic_api(anthropic_canned):
     """Mock Anthropic API for testing without actual API calls."""
     with patch("anthropic.Anthropic") as mock_client:
         mock_instance = Mock()
         mock_client.return_value = mock_instance
 
         # Mock the messages.create method
-        mock_response = Mock()
-        mock_response.content = [Mock(text="Test response from AI")]
-        mock_response.stop_reason = "end_turn"
-
-        mock_instance.messages.create.return_value = mock_response
+        mock_instance.messages.create.return_value = anthropic_canned
 
         yield mock_instance
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def temp_chroma_db():
-    """Create a temporary ChromaDB directory for testing."""
+    """
+    Create a temporary ChromaDB directory shared by the whole test session.
+
+    Tests that write to it should work in their own subdirectory.
+    """
     temp_dir = tempfile.mkdtemp()
-    yield temp_dir
-    shutil.rmtree(temp_dir, ignore_errors=True)
+    try:
+        yield temp_dir
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
 
 
 @pytest.fixture
@@ -84,12 +128,26 @@ This covers advanced topics in the test course.
 @pytest.fixture
 def mock_vector_store(mock_config, sample_course_data):
     """Mock VectorStore for testing."""
+    from vector_store import SearchResults
+
     with patch("vector_store.VectorStore") as mock_vs_class:
         mock_vs = Mock()
         mock_vs_class.return_value = mock_vs
 
         # Mock methods
+        mock_vs.embed_query.return_value = [1.0, 0.0, 0.0]
+        mock_vs.search.return_value = SearchResults(
+            documents=[sample_course_data["lessons"][0]["content"]],
+            metadata=[
+                {"course_title": sample_course_data["title"], "lesson_number": 0}
+            ],
+            distances=[0.1],
+        )
+        mock_vs.get_lesson_links_bulk.return_value = {
+            (sample_course_data["title"], 0): sample_course_data["lessons"][0]["link"]
+        }
         mock_vs.get_existing_course_titles.return_value = [sample_course_data["title"]]
+        mock_vs.get_course_count.return_value = 1
         mock_vs.search_course_content.return_value = [
             {
                 "content": sample_course_data["lessons"][0]["content"],
@@ -109,120 +167,75 @@ def mock_vector_store(mock_config, sample_course_data):
 
 
 @pytest.fixture
-def mock_rag_system(mock_config, mock_anthropic_api, mock_vector_store):
-    """Mock RAGSystem for API testing."""
-    with patch("rag_system.RAGSystem") as mock_rag_class:
-        mock_rag = Mock()
-        mock_rag_class.return_value = mock_rag
-
-        # Mock session manager
-        mock_session_manager = Mock()
-        mock_session_manager.create_session.return_value = "test-session-123"
-        mock_rag.session_manager = mock_session_manager
-
-        # Mock query method
-        mock_rag.query.return_value = (
-            "This is a test response from the RAG system.",
-            [
-                {
-                    "text": "Test Course - Introduction",
-                    "link": "https://example.com/lesson-0",
-                }
-            ],
+def stubbed_vector_store(mock_config):
+    """Real VectorStore whose collections are mocks and whose embedder counts calls."""
+    from vector_store import EmbeddingCache, VectorStore
+
+    with ExitStack() as stack:
+        stack.enter_context(patch("vector_store.chromadb.PersistentClient"))
+        stack.enter_context(
+            patch(
+                "vector_store.chromadb.utils.embedding_functions"
+                ".SentenceTransformerEmbeddingFunction"
+            )
+        )
+        store = VectorStore(
+            mock_config.CHROMA_PATH,
+            mock_config.EMBEDDING_MODEL,
+            mock_config.MAX_RESULTS,
         )
 
-        # Mock analytics method
-        mock_rag.get_course_analytics.return_value = {
-            "total_courses": 1,
-            "course_titles": ["Test Course"],
-        }
+    store.course_catalog = Mock()
+    store.course_content = Mock()
+    store.embedding_function = Mock(
+        side_effect=lambda texts: [[1.0, 0.0, 0.0] for _ in texts]
+    )
+    store.embedding_cache = EmbeddingCache(store.embedding_function)
+    return store
 
-        # Mock add_course_folder method
-        mock_rag.add_course_folder.return_value = (1, 2)  # 1 course, 2 chunks
 
-        yield mock_rag
+@pytest.fixture
+def patched_rag_deps():
+    """Patch RAGSystem's collaborators; yields the class mocks as vs/dp/ai/sm."""
+    with ExitStack() as stack:
+        vs = stack.enter_context(patch("rag_system.VectorStore"))
+        dp = stack.enter_context(patch("rag_system.DocumentProcessor"))
+        ai = stack.enter_context(patch("rag_system.AIGenerator"))
+        sm = stack.enter_context(patch("rag_system.SessionManager"))
+        yield SimpleNamespace(vs=vs, dp=dp, ai=ai, sm=sm)
+
+
+@pytest.fixture(scope="session")
+def canonical_tool_mock():
+    """Shared read-only tool mock with a preset definition; do not mutate."""
+    from search_tools import Tool
+
+    tool = Mock(spec=Tool)
+    tool.get_tool_definition.return_value = {
+        "name": "test_tool",
+        "description": "Test tool",
+        "input_schema": {},
+    }
+    return tool
 
 
 @pytest.fixture
-def test_client(mock_rag_system):
-    """Create a test client with simplified inline app."""
-    from typing import List, Optional
-
-    from fastapi import FastAPI, HTTPException
-    from fastapi.middleware.cors import CORSMiddleware
-    from fastapi.testclient import TestClient
-    from pydantic import BaseModel
-
-    # Create app inline
-    app = FastAPI(title="Test RAG API")
-
-    app.add_middleware(
-        CORSMiddleware,
-        allow_origins=["*"],
-        allow_credentials=True,
-        allow_methods=["*"],
-        allow_headers=["*"],
-    )
+def session_manager_factory():
+    """Return a callable building SessionManagers only when a test needs one."""
+    from session_manager import SessionManager
+
+    def _make(**kwargs):
+        return SessionManager(**kwargs)
+
+    return _make
 
-    # Pydantic models
-    class QueryRequest(BaseModel):
-        query: str
-        session_id: Optional[str] = None
-
-    class SourceCitation(BaseModel):
-        text: str
-        link: Optional[str] = None
-
-    class QueryResponse(BaseModel):
-        answer: str
-        sources: List[SourceCitation]
-        session_id: str
-
-    class CourseStats(BaseModel):
-        total_courses: int
-        course_titles: List[str]
-
-    @app.post("/api/query", response_model=QueryResponse)
-    async def query_documents(request: QueryRequest):
-        try:
-            session_id = request.session_id
-            if not session_id:
-                session_id = mock_rag_system.session_manager.create_session()
-
-            answer, sources = mock_rag_system.query(request.query, session_id)
-
-            formatted_sources = []
-            for source in sources:
-                if isinstance(source, dict):
-                    formatted_sources.append(
-                        SourceCitation(
-                            text=source.get("text", ""), link=source.get("link")
-                        )
-                    )
-                else:
-                    formatted_sources.append(
-                        SourceCitation(text=str(source), link=None)
-                    )
-
-            return QueryResponse(
-                answer=answer, sources=formatted_sources, session_id=session_id
-            )
-        except Exception as e:
-            raise HTTPException(status_code=500, detail=str(e))
-
-    @app.get("/api/courses", response_model=CourseStats)
-    async def get_course_stats():
-        try:
-            analytics = mock_rag_system.get_course_analytics()
-            return CourseStats(
-                total_courses=analytics["total_courses"],
-                course_titles=analytics["course_titles"],
-            )
-        except Exception as e:
-            raise HTTPException(status_code=500, detail=str(e))
 
-    # Create client with mock attached for test access
-    client = TestClient(app)
-    client.mock_rag = mock_rag_system
+@pytest.fixture
+def mock_rag_system(mock_config, mock_anthropic_api, mock_vector_store):
+    """Mock RAGSystem for API testing."""
+    with patch("rag_system.RAGSystem") as mock_rag_class:
+        mock_rag = Mock()
+        mock_rag_class.return_value = mock_rag
+        configure_mock_rag(mock_rag)
 
-    return client
+        yield mock_rag
@@ -1,7 +1,10 @@
+import threading
+from collections import OrderedDict
 from dataclasses import dataclass
-from typing import Any, Dict, List, Optional
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
 
 import chromadb
+import numpy as np
 from chromadb.config import Settings
 from models import Course, CourseChunk
 from sentence_transformers import SentenceTransformer
@@ -41,6 +44,48 @@ class SearchResults:
         return len(self.documents) == 0
 
 
+class EmbeddingCache:
+    """LRU cache of query embeddings, bounded by their total size in bytes"""
+
+    def __init__(
+        self,
+        embedding_function: Callable[[List[str]], Sequence],
+        max_bytes: int = 16 * 1024 * 1024,
+    ):
+        self.embedding_function = embedding_function
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def embed(self, text: str) -> np.ndarray:
+        """Return the (read-only) embedding for text, computing it on a miss"""
+        with self._lock:
+            cached = self._entries.get(text)
+            if cached is not None:
+                self._entries.move_to_end(text)
+                return cached
+
+        # Run the model outside the lock so other lookups are not blocked
+        embedding = np.array(self.embedding_function([text])[0], dtype=np.float32)
+        embedding.flags.writeable = False
+
+        with self._lock:
+            if text not in self._entries:
+                self._entries[text] = embedding
+                self._size += embedding.nbytes
+                while self._size > self.max_bytes and len(self._entries) > 1:
+                    _, evicted = self._entries.popitem(last=False)
+                    self._size -= evicted.nbytes
+        return embedding
+
+    def clear(self):
+        """Drop every cached embedding"""
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+
 class VectorStore:
     """Vector storage using ChromaDB for course content and metadata"""
 
@@ -57,6 +102,8 @@ class VectorStore:
                 model_name=embedding_model
             )
         )
+        # Shared by content search and course name resolution
+        self.embedding_cache = EmbeddingCache(self.embedding_function)
 
         # Create collections for different types of data
         self.course_catalog = self._create_collection(
@@ -72,12 +119,17 @@ class VectorStore:
             name=name, embedding_function=self.embedding_function
         )
 
+    def embed_query(self, text: str) -> np.ndarray:
+        """Embed a query string, reusing the embedding for repeated text"""
+        return self.embedding_cache.embed(text)
+
     def search(
         self,
         query: str,
         course_name: Optional[str] = None,
         lesson_number: Optional[int] = None,
         limit: Optional[int] = None,
+        query_embedding: Optional[Sequence[float]] = None,
     ) -> SearchResults:
         """
         Main search interface that handles course resolution and content search.
@@ -87,6 +139,7 @@ class VectorStore:
             course_name: Optional course name/title to filter by
             lesson_number: Optional lesson number to filter by
             limit: Maximum results to return
+            query_embedding: Precomputed embedding of query, if available
 
         Returns:
             SearchResults object with documents and metadata
@@ -106,8 +159,12 @@ class VectorStore:
         search_limit = limit if limit is not None else self.max_results
 
         try:
+            if query_embedding is None:
+                query_embedding = self.embed_query(query)
             results = self.course_content.query(
-                query_texts=[query], n_results=search_limit, where=filter_dict
+                query_embeddings=[query_embedding],
+                n_results=search_limit,
+                where=filter_dict,
             )
             return SearchResults.from_chroma(results)
         except Exception as e:
@@ -116,7 +173,9 @@ class VectorStore:
     def _resolve_course_name(self, course_name: str) -> Optional[str]:
         """Use vector search to find best matching course by name"""
         try:
-            results = self.course_catalog.query(query_texts=[course_name], n_results=1)
+            results = self.course_catalog.query(
+                query_embeddings=[self.embed_query(course_name)], n_results=1
+            )
 
             if results["documents"][0] and results["metadatas"][0]:
                 # Return the title (which is now the ID)
@@ -291,3 +350,34 @@ class VectorStore:
             return None
         except Exception as e:
             print(f"Error getting lesson link: {e}")
+
+    def get_lesson_links_bulk(
+        self, pairs: List[Tuple[str, int]]
+    ) -> Dict[Tuple[str, int], Optional[str]]:
+        """
+        Get lesson links for many (course title, lesson number) pairs in one fetch.
+
+        Unlike get_lesson_link, catalog errors are raised rather than reported
+        as missing links, so callers can avoid caching incomplete sources.
+        """
+        import json
+
+        links: Dict[Tuple[str, int], Optional[str]] = {pair: None for pair in pairs}
+        course_titles = list({course_title for course_title, _ in links})
+        if not course_titles:
+            return links
+
+        # Fetch every referenced course in a single request
+        results = self.course_catalog.get(ids=course_titles)
+        if results and "metadatas" in results and results["metadatas"]:
+            for metadata in results["metadatas"]:
+                lessons_json = metadata.get("lessons_json")
+                if not lessons_json:
+                    continue
+                course_title = metadata.get("title")
+                for lesson in json.loads(lessons_json):
+                    key = (course_title, lesson.get("lesson_number"))
+                    if key in links:
+                        links[key] = lesson.get("lesson_link")
+
+        return links